@@ -7,7 +7,7 @@ that all agents can read and write to.
 
 Key Concepts:
 1. Shared State: All agents in the chain receive the same context instance
-2. Pydantic Model: Type-safe state management with validation
+2. Slotted Dataclass: Lightweight, typed state with no per-mutation validation
 3. Default Values: Starts with sensible defaults ("unknown" tier)
 4. Mutable: Agents can update fields during the conversation
 
@@ -25,17 +25,23 @@ you might track:
 - session_metadata: Timestamps, channel info, etc.
 """
 
-from pydantic import BaseModel
-from typing import Literal
+from dataclasses import dataclass
 
+from src.agent.tiers import ProductTier
 
-class ConversationContext(BaseModel):
+
+@dataclass(slots=True)
+class ConversationContext:
     """
     Shared state container for multi-agent conversations.
 
-    This Pydantic model is passed to ALL agents in the chain via the Runner.
+    This dataclass is passed to ALL agents in the chain via the Runner.
     Each agent can read the current state and update it as needed.
 
+    It is never parsed from untrusted input - only our own code writes to it -
+    so a plain dataclass is enough: no Pydantic validation on every update,
+    and slots=True drops the per-instance __dict__.
+
     Attributes:
         product_tier: The assigned loan product tier (set by Product Evaluator)
                      Defaults to "unknown" until evaluation is complete
@@ -50,6 +56,6 @@ class ConversationContext(BaseModel):
     4. Chat service sees "gold" and ends conversation
     """
 
-    # Literal type constrains values to our 4 valid tiers
+    # Literal type constrains values to our 4 valid tiers (checked statically)
     # Default "unknown" indicates no evaluation has occurred yet
-    product_tier: Literal["bronze", "silver", "gold", "unknown"] = "unknown"
+    product_tier: ProductTier = "unknown"
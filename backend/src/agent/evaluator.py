@@ -10,6 +10,7 @@ Key Features:
 2. Clear Decision Criteria: Rules-based evaluation with 3 tiers
 3. No Handoffs: This is a terminal agent (conversation ends here)
 4. Input Guardrails: Still protected against malicious inputs
+5. Decision Cache: Same risk profile (no collateral) → same tier, no LLM call
 
 💡 A-HA MOMENT: This agent has NO handoffs configured!
 Check chat_service.py - product_evaluator_agent.handoffs is never set.
@@ -26,15 +27,18 @@ Try These Test Cases:
 3. Fair credit + $50k loan + 30% collateral → Should get Silver tier
 """
 
-from agents import Agent, ModelSettings
+from agents import Agent, ModelSettings, RunConfig, Runner, Session
 from agents.extensions.handoff_prompt import RECOMMENDED_PROMPT_PREFIX
 from textwrap import dedent
-from pydantic import BaseModel
-from typing import Literal
+from pydantic import BaseModel, ConfigDict
+from typing import Final, Literal
 
-from src.models.completions import get_completions_model
+from src.models.completions import get_model_for_role
 from src.guardrails.input_guardrails import check_user_input
 from src.agent.context import ConversationContext
+from src.agent.output import TrustedOutputSchema
+from src.agent.profiler import LoanClassification
+from src.agent.tiers import EvaluatedTier, TIER_DECISION_CRITERIA
 
 
 class LoanProduct(BaseModel):
@@ -53,53 +57,39 @@ class LoanProduct(BaseModel):
         reasoning: Transparent explanation for the decision (for compliance/audit)
     """
 
-    product_tier: Literal["bronze", "silver", "gold"]  # 3 risk tiers
-    reasoning: str  # Required for explainability and regulatory compliance
-
-
-product_evaluator_agent = Agent[ConversationContext](
-    name="Loan Product Evaluator Agent",
-    instructions=dedent(f"""
-        {RECOMMENDED_PROMPT_PREFIX}
-
-        Your job is to evaluate the loan application details and make an
-        underwriting decision in regards to the loan product type.
+    # Frozen: evaluate_cached() hands the same instance to many conversations
+    model_config = ConfigDict(frozen=True)
 
-        Based on the user's responses, classify the loan into one of the
-        predefined categories.
-
-        ## Decision Criteria (Risk-Based Tiering)
+    product_tier: EvaluatedTier  # 3 risk tiers
+    reasoning: str  # Required for explainability and regulatory compliance
 
-        Evaluate applicants across three dimensions: credit score, collateral, and loan amount.
-        Use the following guidelines to assign the appropriate tier:
 
-        - Gold (Low Risk):
-          * Excellent credit scores (750+)
-          * AND/OR sufficient collateral (≥10% of loan value)
-          * AND/OR reasonable loan amounts (≤$20,000)
+# Built once at import (see TIER_DECISION_CRITERIA on dedent() and the handoff prefix)
+_EVALUATOR_INSTRUCTIONS: Final[str] = (
+    RECOMMENDED_PROMPT_PREFIX
+    + dedent("""
+    Your job is to evaluate the loan application details and make an
+    underwriting decision in regards to the loan product type.
 
-        - Silver (Medium Risk):
-          * Good or fair credit scores (650-749)
-          * AND/OR some collateral (≥30% of loan value)
-          * AND/OR moderate loan amounts ($20,001 - $100,000)
+    Based on the user's responses, classify the loan into one of the
+    predefined categories.
+""")
+    + TIER_DECISION_CRITERIA
+)
 
-        - Bronze (High Risk):
-          * Poor credit scores (<650)
-          * AND/OR no collateral or insufficient collateral (<30%)
-          * AND/OR high loan amounts (>$100,000)
 
-        💡 Note: Use your judgment to weigh these factors. For example:
-        - Excellent credit + no collateral + $15k loan → likely Gold
-        - Poor credit + no collateral + $150k loan → definitely Bronze
-        - Fair credit + 30% collateral + $50k loan → likely Silver
-    """),
-    model=get_completions_model(model="gpt-4.1"),
+product_evaluator_agent = Agent[ConversationContext](
+    name="Loan Product Evaluator Agent",
+    instructions=_EVALUATOR_INSTRUCTIONS,
+    model=get_model_for_role("evaluator"),
     # Temperature 0.1 = consistent risk evaluation
-    # Max tokens 500 = room for detailed reasoning
-    model_settings=ModelSettings(temperature=0.1, max_tokens=500),
+    # Max tokens 256 = a tier plus a short paragraph of reasoning
+    model_settings=ModelSettings(temperature=0.1, max_tokens=256),
     # 💡 A-HA MOMENT: Same pattern as Loan Profiler - structured output!
     # This ensures we ALWAYS get a valid tier (bronze/silver/gold) and explanation.
-    output_type=LoanProduct,
+    # The strict schema already constrains the LLM's JSON, so we build the
+    # LoanProduct without re-validating it (see src/agent/output.py)
+    output_type=TrustedOutputSchema(LoanProduct),
     # 💡 A-HA MOMENT: Even the final agent uses input guardrails!
     # Defense in depth - we validate at every step, not just at the entry point.
     # This protects against:
@@ -108,3 +98,94 @@ product_evaluator_agent = Agent[ConversationContext](
     # - Injection attacks attempting to exfiltrate data
     input_guardrails=[check_user_input],
 )
+
+
+# Amount bands straight from the decision criteria: ≤$20k, $20k-$100k, >$100k
+AmountBucket = Literal["small", "moderate", "high"]
+
+
+def _amount_bucket(amount: float) -> AmountBucket:
+    if amount <= 20_000:
+        return "small"
+    if amount <= 100_000:
+        return "moderate"
+    return "high"
+
+
+# At most 5 credit scores x 3 amount buckets = 15 entries, for applicants with
+# no collateral. Only the tier is cached - the reasoning cites one applicant's
+# own figures.
+_evaluation_cache: dict[tuple[str, AmountBucket], EvaluatedTier] = {}
+
+
+def _profile_reasoning(
+    classification: LoanClassification, tier: EvaluatedTier, bucket: AmountBucket
+) -> str:
+    """Explain a cached tier decision with THIS applicant's figures."""
+    collateral = "with collateral" if classification.collateral else "no collateral"
+    return (
+        f"{tier.capitalize()} tier: {classification.credit_score} credit, "
+        f"{collateral}, ${classification.amount:,.0f} loan ({bucket} amount band). "
+        "Same risk profile as a previously evaluated application."
+    )
+
+
+async def evaluate_cached(
+    classification: LoanClassification,
+    context: ConversationContext,
+    session: Session | None = None,
+    run_config: RunConfig | None = None,
+) -> LoanProduct:
+    """
+    Run the Product Evaluator on a completed loan profile, memoizing the decision.
+
+    Without collateral, the tier only depends on two features of the profile:
+    credit score and the amount band. With temperature 0.1 and rules-based
+    instructions, two such applicants with the same features get the same tier -
+    so only the first one pays for an LLM call.
+
+    Applicants WITH collateral always go to the LLM: the decision criteria grade
+    collateral as a share of the loan (≥10% / ≥30%), and that share is only in
+    the conversation - the profile just says whether there is any.
+
+    💡 A-HA MOMENT: The cache key is tiny on purpose!
+    Quantizing the amount into the same bands the decision criteria use keeps
+    the key space at 15 combinations, so the hit rate climbs very quickly.
+
+    Note: On a cache hit the reasoning is NOT written by the LLM - it is built
+    from the current applicant's profile, so it never quotes someone else's data.
+
+    Args:
+        classification: The Loan Profiler's output, with all data points collected
+        context: Shared conversation context passed to the evaluator run
+        session: The conversation so far - the evaluator reads it (like after a
+            handoff) and its decision is appended to it
+        run_config: Run settings of the conversation (e.g. its prompt_cache_key)
+
+    Returns:
+        LoanProduct: The tier decision, with reasoning for this applicant
+    """
+    bucket = _amount_bucket(classification.amount)
+    key = (classification.credit_score, bucket)
+    cached_tier = None if classification.collateral else _evaluation_cache.get(key)
+    if cached_tier is not None:
+        return LoanProduct(
+            product_tier=cached_tier,
+            reasoning=_profile_reasoning(classification, cached_tier, bucket),
+        )
+
+    # The profile goes in on top of the conversation history, so the evaluator
+    # sees both the collected data points and the user's own words
+    profile = classification.model_dump_json(
+        exclude={"next_question", "product_tier", "tier_reasoning"}
+    )
+    result = await Runner.run(
+        product_evaluator_agent,
+        profile,
+        context=context,
+        session=session,
+        run_config=run_config,
+    )
+    if not classification.collateral:
+        _evaluation_cache[key] = result.final_output.product_tier
+    return result.final_output
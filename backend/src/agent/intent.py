@@ -6,7 +6,7 @@ Its job is simple but critical: determine if the user's query is loan-related.
 
 Key Design Decisions:
 - Low temperature (0.1): We want deterministic, consistent routing decisions
-- Small max_tokens (100): Intent classification shouldn't require long responses
+- Small max_tokens (64): Intent classification shouldn't require long responses
 - No output schema: Returns plain text when rejecting non-loan queries
 - No input guardrails: This is the first line of defense, so we don't double-check
 
@@ -21,22 +21,28 @@ Try These Test Cases:
 """
 
 from agents import Agent, ModelSettings
-from src.models.completions import get_completions_model
+from src.models.completions import get_model_for_role
 from src.guardrails.input_guardrails import check_user_input  # Imported but not used
 from src.agent.context import ConversationContext
 from textwrap import dedent
+from typing import Final
+
+
+_INTENT_INSTRUCTIONS: Final[str] = dedent("""
+    Your job is to analyze user intents based on their input queries.
+    Given a user query, determine the underlying intent.
+    If the user's intent is related to financial loans, hand over to the Loan Profiler Agent.
+    If not, respond politely indicating that you cannot assist with non-loan related queries.
+""")
 
 
 intent_agent = Agent[ConversationContext](
     name="Intent Investigation Agent",
-    instructions=dedent("""
-        Your job is to analyze user intents based on their input queries.
-        Given a user query, determine the underlying intent.
-        If the user's intent is related to financial loans, hand over to the Loan Profiler Agent.
-        If not, respond politely indicating that you cannot assist with non-loan related queries.
-    """),
-    model=get_completions_model(model="gpt-4.1"),
+    instructions=_INTENT_INSTRUCTIONS,
+    model=get_model_for_role("intent"),
     # Low temperature = more deterministic routing decisions
     # We want consistent behavior when classifying intents
-    model_settings=ModelSettings(temperature=0.1, max_tokens=100),
+    # Max tokens 64 = a handoff call or a one-line polite refusal, nothing more.
+    # Output length dominates latency, so this caps the worst-case turn.
+    model_settings=ModelSettings(temperature=0.1, max_tokens=64),
 )
@@ -0,0 +1,55 @@
+"""
+Trusted Output Schema - Skipping Re-Validation of Structured Outputs
+
+The Agent SDK turns every structured LLM response into a Pydantic object by
+running full model validation on the JSON. But our agents use OpenAI's strict
+structured outputs: the provider already forces the model to emit JSON that
+matches the schema we send. Validating it a second time is duplicated work on
+every single turn.
+
+Key Concepts:
+1. Same Schema, Different Parser: The strict JSON schema sent to the LLM is unchanged
+2. model_construct(): Builds the Pydantic object WITHOUT running validators
+3. Built Once: The schema object is created at import, not on every Runner.run()
+4. Fast Parser: pydantic-core's Rust JSON parser instead of the stdlib json module
+
+💡 A-HA MOMENT: Trust boundaries matter!
+User text is untrusted, so it still goes through input guardrails. The model's
+output is constrained by the provider's structured-output mode, so we can skip
+validation ONLY there.
+"""
+
+from typing import Any
+
+from agents import AgentOutputSchema, ModelBehaviorError
+from pydantic import BaseModel
+from pydantic_core import from_json
+
+
+class TrustedOutputSchema(AgentOutputSchema):
+    """
+    AgentOutputSchema that builds outputs with model_construct() instead of validating.
+
+    Pass an instance as an agent's output_type. The SDK uses it as-is instead of
+    wrapping the Pydantic class in a new AgentOutputSchema on every run.
+
+    Args:
+        output_type: A Pydantic model class with only JSON-native fields
+    """
+
+    def __init__(self, output_type: type[BaseModel]):
+        # Strict mode is what makes skipping validation safe - always keep it on
+        super().__init__(output_type, strict_json_schema=True)
+
+    def validate_json(self, json_str: str) -> Any:
+        # pydantic-core ships with Pydantic and parses several times faster
+        # than json.loads - no extra dependency needed
+        try:
+            data = from_json(json_str)
+        except ValueError as e:
+            raise ModelBehaviorError(f"Invalid JSON: {json_str}") from e
+
+        if not isinstance(data, dict):
+            raise ModelBehaviorError(f"Expected a JSON object, got: {json_str}")
+
+        return self.output_type.model_construct(**data)
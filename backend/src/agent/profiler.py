@@ -9,6 +9,7 @@ Key Features:
 2. Conversational Flow: Controls the conversation via next_question field
 3. Input Validation: Protected by input_guardrails to prevent abuse
 4. Literal Types: Constrains values to predefined categories (no free-form chaos!)
+5. Fast Path: When all 5 data points are known, it assigns the product tier itself
 
 💡 A-HA MOMENT: The next_question field is the secret sauce!
 - If next_question is NOT None: Continue the conversation (ask the question)
@@ -16,6 +17,11 @@ Key Features:
 
 This pattern allows the agent to control pacing without external orchestration.
 
+💡 A-HA MOMENT: Why hand off when you already know the answer?
+If the user gives everything in one message ("$15k for a car, 36 months,
+excellent credit, no collateral"), the profiler fills in product_tier directly
+and the chat service ends the conversation - one LLM round-trip instead of two.
+
 Try These Test Cases:
 1. Answer all 5 questions sequentially → Watch next_question change
 2. Try to inject sensitive data like SSN → Input guardrail should block it
@@ -25,12 +31,14 @@ Try These Test Cases:
 from agents import Agent, ModelSettings
 from agents.extensions.handoff_prompt import RECOMMENDED_PROMPT_PREFIX
 from textwrap import dedent
-from pydantic import BaseModel
-from typing import Literal
+from pydantic import BaseModel, ConfigDict
+from typing import Final, Literal
 
-from src.models.completions import get_completions_model
+from src.models.completions import get_model_for_role
 from src.guardrails.input_guardrails import check_user_input
 from src.agent.context import ConversationContext
+from src.agent.output import TrustedOutputSchema
+from src.agent.tiers import EvaluatedTier, TIER_DECISION_CRITERIA
 
 
 class LoanClassification(BaseModel):
@@ -53,8 +61,13 @@ class LoanClassification(BaseModel):
         collateral: Whether the user has collateral (binary yes/no decision)
         reasoning: Agent's explanation for the classification (for transparency)
         next_question: Next question to ask, or None if profiling is complete
+        product_tier: The assigned tier when all data points are known, else None
+        tier_reasoning: Explanation for product_tier (for compliance/audit), else None
     """
 
+    # Parsed outputs are read-only; frozen=True enforces it (and makes them hashable)
+    model_config = ConfigDict(frozen=True)
+
     # Literal types ensure the agent picks from a fixed set of values
     purpose: Literal[
         "home_purchase",
@@ -70,46 +83,62 @@ class LoanClassification(BaseModel):
     collateral: bool  # Simple binary: has collateral or doesn't
     reasoning: str  # Required for explainability and debugging
     next_question: str | None = None  # None signals "profiling complete"
+    # Fast path: set only when the profiler can already make the tier decision
+    product_tier: EvaluatedTier | None = None
+    tier_reasoning: str | None = None
+
+
+# Built once at import (see TIER_DECISION_CRITERIA on dedent() and the handoff prefix)
+_PROFILER_INSTRUCTIONS: Final[str] = (
+    RECOMMENDED_PROMPT_PREFIX
+    + dedent("""
+    Your job is to ask questions to the user to gather information about their loan needs.
+    Based on the user's responses, classify the loan into one of the predefined categories.
+
+    ## Questions you need to ask (5 key data points)
+
+    1. What is the purpose of the loan? (e.g., home purchase, car purchase, debt consolidation, business investment, education, etc.)
+    2. What is the desired loan amount?
+    3. What is the preferred loan term? (e.g., 12 months, 24 months, 36 months, etc.)
+    4. What is your credit score range? (e.g., excellent, good, fair, poor)
+    5. Do you have any collateral to offer for the loan? (e.g., property, vehicle, savings, etc.)
+
+    Based on the user's responses, classify the loan details into the appropriate categories.
+
+    You need to provide the following information:
+
+    purpose: The purpose of the loan.
+    amount: The desired loan amount.
+    term: The preferred loan term.
+    credit_score: The credit score range of the user.
+    collateral: Whether the user has collateral to offer.
+    reasoning: Your explanation on why you classified the loan in this way.
+    next_question: If you need more information to complete the classification, provide the next question to ask the user.
+    product_tier: Only if you have all 5 data points, the tier you assign using the Decision Criteria below. Otherwise null.
+    tier_reasoning: Only if you set product_tier, your explanation for that tier. Otherwise null.
+
+    If you have all the information, set product_tier and tier_reasoning yourself.
+    Only hand over to the product_evaluator_agent if you cannot decide on a tier.
+""")
+    + TIER_DECISION_CRITERIA
+)
 
 
 loan_profiler_agent = Agent[ConversationContext](
     name="Loan Profiler Agent",
-    instructions=dedent(f"""
-        {RECOMMENDED_PROMPT_PREFIX}
-
-        Your job is to ask questions to the user to gather information about their loan needs.
-        Based on the user's responses, classify the loan into one of the predefined categories.
-
-        ## Questions you need to ask (5 key data points)
-
-        1. What is the purpose of the loan? (e.g., home purchase, car purchase, debt consolidation, business investment, education, etc.)
-        2. What is the desired loan amount?
-        3. What is the preferred loan term? (e.g., 12 months, 24 months, 36 months, etc.)
-        4. What is your credit score range? (e.g., excellent, good, fair, poor)
-        5. Do you have any collateral to offer for the loan? (e.g., property, vehicle, savings, etc.)
-
-        Based on the user's responses, classify the loan details into the appropriate categories.
-
-        You need to provide the following information:
-
-        purpose: The purpose of the loan.
-        amount: The desired loan amount.
-        term: The preferred loan term.
-        credit_score: The credit score range of the user.
-        collateral: Whether the user has collateral to offer.
-        reasoning: Your explanation on why you classified the loan in this way.
-        next_question: If you need more information to complete the classification, provide the next question to ask the user.
-
-        If you have all the information, hand over to the product_evaluator_agent.
-    """),
-    model=get_completions_model(model="gpt-4.1"),
+    instructions=_PROFILER_INSTRUCTIONS,
+    model=get_model_for_role("profiler"),
     # Temperature 0.1 = consistent questioning pattern
     # Max tokens 500 = enough room for question + structured output
+    # (every turn re-emits ALL fields plus reasoning, not just next_question -
+    # a tighter cap would cut the JSON off mid-object)
     model_settings=ModelSettings(temperature=0.1, max_tokens=500),
     # 💡 A-HA MOMENT: output_type forces structured JSON responses!
     # Without this, we'd get free-form text that's hard to parse and validate.
     # With it, the LLM MUST conform to the LoanClassification schema.
-    output_type=LoanClassification,
+    # The strict schema already constrains the LLM's JSON, so we build the
+    # LoanClassification without re-validating it (see src/agent/output.py)
+    output_type=TrustedOutputSchema(LoanClassification),
     # 💡 A-HA MOMENT: input_guardrails run BEFORE the agent processes input!
     # This is like having a security guard check IDs before entering the building.
     # The check_user_input guardrail validates:
@@ -0,0 +1,52 @@
+"""
+Product Tiers - The Shared Vocabulary of Loan Decisions
+
+The conversation context, the Loan Profiler and the Product Evaluator all talk
+about the same Bronze/Silver/Gold tiers. Instead of repeating the Literal (and
+the rules for picking a tier) in every module, we define them once here and
+import them everywhere.
+
+💡 A-HA MOMENT: One Literal alias = one source of truth!
+Adding a "platinum" tier later means changing ONE line, and every schema that
+uses these aliases (and the JSON schema sent to the LLM) picks it up.
+"""
+
+from textwrap import dedent
+from typing import Final, Literal, TypeAlias
+
+# A tier the evaluator can actually assign (3 risk tiers)
+EvaluatedTier: TypeAlias = Literal["bronze", "silver", "gold"]
+
+# What the conversation tracks: an evaluated tier, or "unknown" before evaluation
+ProductTier: TypeAlias = Literal[EvaluatedTier, "unknown"]
+
+# The rules for picking a tier, shared by every agent that is allowed to assign one.
+# Agent prompts are built from constants like this one, dedented ONCE at import
+# instead of on every run. Prompts that start with the handoff prefix prepend it
+# AFTER dedent(): its unindented lines would stop dedent() from stripping the body.
+TIER_DECISION_CRITERIA: Final[str] = dedent("""
+    ## Decision Criteria (Risk-Based Tiering)
+
+    Evaluate applicants across three dimensions: credit score, collateral, and loan amount.
+    Use the following guidelines to assign the appropriate tier:
+
+    - Gold (Low Risk):
+      * Excellent credit scores (750+)
+      * AND/OR sufficient collateral (≥10% of loan value)
+      * AND/OR reasonable loan amounts (≤$20,000)
+
+    - Silver (Medium Risk):
+      * Good or fair credit scores (650-749)
+      * AND/OR some collateral (≥30% of loan value)
+      * AND/OR moderate loan amounts ($20,001 - $100,000)
+
+    - Bronze (High Risk):
+      * Poor credit scores (<650)
+      * AND/OR no collateral or insufficient collateral (<30%)
+      * AND/OR high loan amounts (>$100,000)
+
+    💡 Note: Use your judgment to weigh these factors. For example:
+    - Excellent credit + no collateral + $15k loan → likely Gold
+    - Poor credit + no collateral + $150k loan → definitely Bronze
+    - Fair credit + 30% collateral + $50k loan → likely Silver
+""")
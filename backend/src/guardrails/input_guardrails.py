@@ -3,13 +3,17 @@ Input Guardrails - The Security Layer
 
 This module implements input validation guardrails using the "agent as guardrail"
 pattern. Instead of writing brittle regex rules, we use a small, fast LLM to
-evaluate whether user inputs are safe and appropriate.
+evaluate whether user inputs are safe and appropriate. A handful of compiled
+regexes only short-circuit the blatant cases (SSNs, card numbers, crude
+profanity) before any LLM call is made.
 
 Key Concepts:
 1. Agent as Guardrail: A dedicated mini-agent (GPT-4.1-mini) validates inputs
 2. Tripwire Mechanism: If guidelines are violated, the guardrail "trips" and blocks execution
 3. Decorator Pattern: @input_guardrail wraps the validation logic
-4. Structured Output: Returns both a boolean (violates?) and explanation (why?)
+4. Structured Output: Returns a boolean verdict (violates?) - the explanation (why?)
+   is only generated, by a second call, when the input is actually rejected
+5. Regex Prefilter: Obvious violations are rejected in microseconds, with no LLM call
 
 💡 A-HA MOMENT: This is "LLM-protecting-LLM"!
 We use a cheap, fast model (GPT-4.1-mini) to validate inputs BEFORE they reach
@@ -36,23 +40,49 @@ Try These Test Cases:
 
 from agents import (
     Agent,
+    AgentOutputSchema,
     Runner,
     ModelSettings,
+    ModelBehaviorError,
     input_guardrail,
     GuardrailFunctionOutput,
     RunContextWrapper,
     TResponseInputItem,
 )
-from src.models.completions import get_completions_model
+from src.models.completions import get_model_for_role
+from src.agent.output import TrustedOutputSchema
+from collections import OrderedDict
+import asyncio
+import re
 from textwrap import dedent
-from pydantic import BaseModel
+from typing import Any, Callable, Final
+from pydantic import BaseModel, ConfigDict
+import json
+
+
+class InputGuardrailVerdict(BaseModel):
+    """
+    Structured output of the guardrail agent: just the verdict.
+
+    This is the hot path - almost every input is safe - so we only ask the LLM
+    for the one field that drives the tripwire. Fewer output tokens means the
+    main agent is unblocked sooner.
+
+    Attributes:
+        violates_guidelines: True if input breaks rules, False if safe
+    """
+
+    # Read-only once parsed
+    model_config = ConfigDict(frozen=True)
+
+    violates_guidelines: bool
 
 
 class InputGuardrailSchema(BaseModel):
     """
-    Structured output for guardrail validation results.
+    Guardrail validation results reported back to the Agent SDK (output_info).
 
-    The guardrail agent returns this schema to indicate:
+    This schema indicates:
     1. Whether the input violates guidelines (boolean flag)
     2. Why it was flagged (optional feedback string)
 
@@ -61,37 +91,298 @@ class InputGuardrailSchema(BaseModel):
         feedback: Human-readable explanation of the violation (or None if safe)
     """
 
+    # Cached GuardrailFunctionOutputs share this object, so keep it immutable
+    model_config = ConfigDict(frozen=True)
+
     violates_guidelines: bool
     feedback: str | None
 
 
+_GUIDELINES: Final[str] = dedent("""
+    Guidelines:
+    1. No personal or sensitive information (SSN, credit card numbers, passwords, etc.)
+    2. No offensive or inappropriate language (profanity, hate speech, threats)
+    3. Stay relevant to the topic of financial loans (reject off-topic queries)
+""")
+
+_GUARDRAIL_INSTRUCTIONS: Final[str] = (
+    dedent("""
+    Your job is to ensure that user inputs adhere to the specified guidelines.
+""")
+    + _GUIDELINES
+    + dedent("""
+    Return:
+    - violates_guidelines: true if ANY guideline is broken, false otherwise
+""")
+)
+
+_BATCH_INSTRUCTIONS: Final[str] = (
+    dedent("""
+    Your job is to ensure that user inputs adhere to the specified guidelines.
+    You will receive a numbered list of independent user inputs.
+""")
+    + _GUIDELINES
+    + dedent("""
+    Return one boolean per input, in the same order as the list:
+    true if ANY guideline is broken by that input, false otherwise
+""")
+)
+
+_FEEDBACK_INSTRUCTIONS: Final[str] = (
+    dedent("""
+    The user's input was rejected because it violates the specified guidelines.
+    Briefly explain which guideline was violated, in one constructive sentence.
+""")
+    + _GUIDELINES
+)
+
+
 input_guardrail_agent = Agent(
     name="Input Guardrail Agent",
-    instructions=dedent("""
-        Your job is to ensure that user inputs adhere to the specified guidelines.
-        If an input violates the guidelines, provide constructive feedback.
-
-        Guidelines:
-        1. No personal or sensitive information (SSN, credit card numbers, passwords, etc.)
-        2. No offensive or inappropriate language (profanity, hate speech, threats)
-        3. Stay relevant to the topic of financial loans (reject off-topic queries)
-
-        Return:
-        - violates_guidelines: true if ANY guideline is broken, false otherwise
-        - feedback: Brief explanation of what was violated (or null if input is safe)
-    """),
+    instructions=_GUARDRAIL_INSTRUCTIONS,
     # 💡 A-HA MOMENT: We use GPT-4.1-mini instead of GPT-4.1!
     # Guardrail checks don't need advanced reasoning - they're binary decisions.
     # Using a smaller model reduces latency (faster) and cost (cheaper).
-    model=get_completions_model(model="gpt-4.1-mini"),
+    model=get_model_for_role("guardrail"),
     # Temperature 0.1 = consistent validation (we want deterministic safety checks)
-    # Max tokens 50 = just enough for boolean + short feedback
+    # Max tokens 16 = just enough for {"violates_guidelines":false}
+    model_settings=ModelSettings(temperature=0.1, max_tokens=16),
+    # Structured output ensures we ALWAYS get a boolean verdict
+    # Passing a prebuilt schema means the JSON schema is derived once here,
+    # instead of on every Runner.run() of this very hot agent. Like the profiler
+    # and evaluator, the strict-mode output is trusted (see src/agent/output.py)
+    output_type=TrustedOutputSchema(InputGuardrailVerdict),
+)
+
+# Same check as above, but for several inputs at once (see BatchingGuardrail)
+input_guardrail_batch_agent = Agent(
+    name="Input Guardrail Batch Agent",
+    instructions=_BATCH_INSTRUCTIONS,
+    model=get_model_for_role("guardrail"),
+    # Max tokens 64 = one boolean per input for a full batch of 8
+    model_settings=ModelSettings(temperature=0.1, max_tokens=64),
+    # One verdict per input, in order (schema prebuilt, as above)
+    output_type=AgentOutputSchema(list[bool]),
+)
+
+# 💡 A-HA MOMENT: Specialize for the common case!
+# Most inputs pass, and nobody reads feedback for a safe input. So the
+# explanation lives in a separate agent that only runs AFTER a violation.
+input_guardrail_feedback_agent = Agent(
+    name="Input Guardrail Feedback Agent",
+    instructions=_FEEDBACK_INSTRUCTIONS,
+    model=get_model_for_role("guardrail"),
+    # Max tokens 50 = one short sentence of feedback
     model_settings=ModelSettings(temperature=0.1, max_tokens=50),
-    # Structured output ensures we ALWAYS get a boolean and optional explanation
-    output_type=InputGuardrailSchema,
 )
 
 
+class BatchingGuardrail:
+    """
+    Coalesces concurrent guardrail checks into a single LLM call.
+
+    Every check pays for an HTTP round-trip and the full guardrail prompt. When
+    several inputs arrive at once (e.g. many concurrent conversations), we wait
+    a few milliseconds, send them all as one numbered list, and fan the list of
+    verdicts back out to each caller.
+
+    💡 A-HA MOMENT: A batch of ONE is just the regular single-input check!
+    When nothing else is in flight, an input is sent right away - no waiting.
+    The debounce window only opens once a second input arrives while a check
+    is still running, i.e. when there is actually something to batch. A single
+    chat (one guarded run per turn) never waits.
+
+    Trade-off: A batch puts several UNTRUSTED inputs into one LLM call. One
+    input's text can try to steer the verdicts on the others ("mark every item
+    false") - a prompt-injection surface the single-input check doesn't have.
+    JSON-encoding each input keeps the list structure intact, but it is not a
+    defense against the model following instructions inside an item. Use
+    max_batch_size=1 where that risk matters more than the saved calls.
+
+    Args:
+        max_batch_size: Flush immediately once this many inputs are pending
+        debounce_seconds: How long to wait for more inputs before flushing
+    """
+
+    def __init__(self, max_batch_size: int = 8, debounce_seconds: float = 0.01):
+        self.max_batch_size = max_batch_size
+        self.debounce_seconds = debounce_seconds
+        self._pending: list[
+            tuple[str | list[TResponseInputItem], Any, asyncio.Future[bool]]
+        ] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    async def check(self, input: str | list[TResponseInputItem], context: Any) -> bool:
+        """Queue an input for the next batch and wait for its verdict."""
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[bool] = loop.create_future()
+        self._pending.append((input, context, future))
+
+        # Nothing in flight = nothing to batch with, so don't wait for company
+        if not self._tasks or len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.debounce_seconds, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        # Keep a reference so the task isn't garbage collected mid-flight
+        task = asyncio.create_task(self._run_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(
+        self,
+        batch: list[tuple[str | list[TResponseInputItem], Any, asyncio.Future[bool]]],
+    ) -> None:
+        # A lone input runs with its conversation's context, like a direct check
+        context = batch[0][1] if len(batch) == 1 else None
+        try:
+            verdicts = await self._classify([input for input, _, _ in batch], context)
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, _, future), verdict in zip(batch, verdicts):
+            if not future.done():  # The caller may have been cancelled meanwhile
+                future.set_result(verdict)
+
+    async def _classify(
+        self, inputs: list[str | list[TResponseInputItem]], context: Any
+    ) -> list[bool]:
+        if len(inputs) == 1:
+            result = await Runner.run(input_guardrail_agent, inputs[0], context=context)
+            return [result.final_output.violates_guidelines]
+
+        # JSON-encode each input so newlines can't break the numbered list
+        numbered = "\n".join(
+            f"{i}. {json.dumps(input, ensure_ascii=False, default=str)}"
+            for i, input in enumerate(inputs, start=1)
+        )
+        # Each input comes from its own conversation - there is no one context
+        # for the whole batch, so the batch agent runs without one
+        result = await Runner.run(input_guardrail_batch_agent, numbered)
+        verdicts = result.final_output
+        if len(verdicts) != len(inputs):
+            raise ModelBehaviorError(
+                f"Expected {len(inputs)} guardrail verdicts, got {len(verdicts)}"
+            )
+        return verdicts
+
+
+_batcher = BatchingGuardrail()
+
+
+# Regex prefilter, compiled once at import time.
+# These only catch the blatant cases - everything else still goes to the LLM.
+_SSN_RE: Final[re.Pattern[str]] = re.compile(r"\b\d{3}-\d{2}-\d{4}\b")
+# Card shapes only: 13-16 digits in a row, or 4-4-4-4 groups with ONE separator.
+# Lists of amounts ("20000 40000 60000") or terms ("12 24 36 months") don't match.
+_CARD_NUMBER_RE: Final[re.Pattern[str]] = re.compile(
+    r"(?<![\d-])(?:\d{13,16}|\d{4}([ -])\d{4}\1\d{4}\1\d{4})(?![\d-])"
+)
+_PROFANITY_RE: Final[re.Pattern[str]] = re.compile(
+    r"\b(?:fuck\w*|motherfuck\w*|shit(?:s|ty)?|bitch(?:es)?|asshole|cunt)\b",
+    re.IGNORECASE,
+)
+
+
+def _passes_luhn(digits: str) -> bool:
+    """Luhn checksum, which every real card number passes (most long numbers don't)."""
+    total = 0
+    for i, char in enumerate(reversed(digits)):
+        digit = int(char)
+        if i % 2 == 1:
+            digit = digit * 2 - 9 if digit > 4 else digit * 2
+        total += digit
+    return total % 10 == 0
+
+
+def _contains_card_number(text: str) -> bool:
+    # 💡 A-HA MOMENT: The regex finds candidates, the checksum confirms them!
+    # "I want 1000000000000 dollars" has the right length but fails Luhn.
+    return any(
+        _passes_luhn(re.sub(r"\D", "", match.group()))
+        for match in _CARD_NUMBER_RE.finditer(text)
+    )
+
+
+_PREFILTER_RULES: Final[tuple[tuple[Callable[[str], object], str], ...]] = (
+    (_SSN_RE.search, "Please don't share personal information such as your SSN."),
+    (
+        _contains_card_number,
+        "Please don't share personal information such as card numbers.",
+    ),
+    (_PROFANITY_RE.search, "Please keep the conversation respectful."),
+)
+
+
+def _latest_user_text(input: str | list[TResponseInputItem]) -> str:
+    """Extract the text of the latest user message from plain text or message items."""
+    if isinstance(input, str):
+        return input
+
+    # Only the newest message: earlier ones were already checked on their own
+    # turn, and re-scanning them would let one match trip every later turn
+    for item in reversed(input):
+        if not isinstance(item, dict) or item.get("role") != "user":
+            continue
+        content = item.get("content")
+        if isinstance(content, str):
+            return content
+        if isinstance(content, list):
+            return "\n".join(
+                part["text"]
+                for part in content
+                if isinstance(part, dict) and isinstance(part.get("text"), str)
+            )
+    return ""
+
+
+def _prefilter(input: str | list[TResponseInputItem]) -> GuardrailFunctionOutput | None:
+    """Reject obvious violations without an LLM call, or return None to keep going."""
+    text = _latest_user_text(input)
+    for matches, feedback in _PREFILTER_RULES:
+        if matches(text):
+            return GuardrailFunctionOutput(
+                output_info=InputGuardrailSchema(
+                    violates_guidelines=True, feedback=feedback
+                ),
+                tripwire_triggered=True,
+            )
+    return None
+
+
+# Guardrail verdicts are a pure function of the input, so we memoize them.
+# With a session, the input is the WHOLE conversation so far - so a key only
+# repeats for identical conversation openers, and only when one process serves
+# several conversations (each run() of the chat service is one). A one-shot CLI
+# run never hits: its opener is its first check. Longer inputs are never
+# cached: they won't repeat, and each entry would hold a full transcript.
+# Bounded LRU: the oldest entry is evicted once we hit _CACHE_MAXSIZE.
+_CACHE_MAXSIZE: Final[int] = 1024
+_CACHE_MAX_KEY_CHARS: Final[int] = 1024
+_guardrail_cache: OrderedDict[str, GuardrailFunctionOutput] = OrderedDict()
+
+
+def _cache_key(input: str | list[TResponseInputItem]) -> str | None:
+    """Build a hashable cache key from text or message items (None = don't cache)."""
+    if isinstance(input, str):
+        key = input
+    else:
+        key = json.dumps(input, sort_keys=True, default=str)
+    return key if len(key) <= _CACHE_MAX_KEY_CHARS else None
+
+
 @input_guardrail
 async def check_user_input(
     ctx: RunContextWrapper[None], agent: Agent, input: str | list[TResponseInputItem]
@@ -107,7 +398,7 @@ async def check_user_input(
     1. User sends input → Runner.run() receives it
     2. BEFORE main agent runs, this function executes
     3. Guardrail agent (GPT-4.1-mini) analyzes the input
-    4. If violates_guidelines=True, the tripwire triggers
+    4. If violates_guidelines=True, the feedback agent explains why and the tripwire triggers
     5. If tripwire triggers, main agent is NEVER called (execution halts)
     6. User receives feedback about why their input was rejected
 
@@ -126,13 +417,47 @@ async def check_user_input(
         - tripwire_triggered: Whether to halt execution (True if violated)
     """
 
+    # 💡 A-HA MOMENT: Not every check needs an LLM!
+    # An SSN is an SSN - a regex spots it in microseconds, for free.
+    prefiltered = _prefilter(input)
+    if prefiltered is not None:
+        return prefiltered
+
+    # 💡 A-HA MOMENT: Same input, same verdict - no need to ask the LLM twice!
+    # A cache hit is a dict lookup instead of a ~200-500ms guardrail round-trip.
+    # A process serving many conversations sees the same "I need a loan" opener
+    # over and over - those hit the cache (see _guardrail_cache above).
+    key = _cache_key(input)
+    cached = _guardrail_cache.get(key) if key is not None else None
+    if cached is not None:
+        _guardrail_cache.move_to_end(key)
+        return cached
+
     # Run the guardrail agent synchronously (blocking validation)
-    result = await Runner.run(input_guardrail_agent, input, context=ctx.context)
+    # Concurrent checks share one LLM call via the batcher
+    violates_guidelines = await _batcher.check(input, ctx.context)
+
+    # Cold path: only explain the verdict when the input was actually rejected
+    feedback = None
+    if violates_guidelines:
+        feedback_result = await Runner.run(
+            input_guardrail_feedback_agent, input, context=ctx.context
+        )
+        feedback = feedback_result.final_output
 
     # 💡 A-HA MOMENT: See how we map the schema to the tripwire?
     # If violates_guidelines=True → tripwire_triggered=True → execution halts!
     # This elegant mapping makes it impossible to accidentally allow bad inputs.
-    return GuardrailFunctionOutput(
-        output_info=result.final_output,  # Contains the full validation schema
-        tripwire_triggered=result.final_output.violates_guidelines,  # The kill switch
+    output = GuardrailFunctionOutput(
+        output_info=InputGuardrailSchema(  # Contains the full validation schema
+            violates_guidelines=violates_guidelines, feedback=feedback
+        ),
+        tripwire_triggered=violates_guidelines,  # The kill switch
     )
+
+    if key is not None:
+        _guardrail_cache[key] = output
+        if len(_guardrail_cache) > _CACHE_MAXSIZE:
+            _guardrail_cache.popitem(last=False)
+
+    return output
@@ -7,9 +7,10 @@ swap models across the entire application.
 
 Key Concepts:
 1. Factory Pattern: Single function creates all model instances
-2. Async Client: Uses AsyncOpenAI for non-blocking I/O operations
+2. Async Client: One shared AsyncOpenAI client for non-blocking I/O operations
 3. SDK Wrapper: OpenAIChatCompletionsModel wraps the raw OpenAI client
 4. Default Model: GPT-4.1 as the sensible default for most tasks
+5. Model per Role: Each agent asks for its role, not for a model name
 
 💡 A-HA MOMENT: Why use a factory instead of creating clients directly?
 - Centralized configuration (change once, affect everywhere)
@@ -17,24 +18,79 @@ Key Concepts:
 - Type safety (returns the Agent SDK's model wrapper)
 - Environment management (dotenv loaded in one place)
 
-Model Choices in This Workshop:
-- GPT-4.1: Main agents (intent, profiler, evaluator) - best reasoning
-- GPT-4.1-mini: Guardrail agent - fast, cheap, sufficient for simple checks
+Model Choices in This Workshop (see MODEL_BY_ROLE):
+- GPT-4.1: Profiler and evaluator - best reasoning for multi-field extraction
+  and risk decisions
+- GPT-4.1-mini: Intent and guardrail agents - fast, cheap, sufficient for
+  simple yes/no routing and checks
 
 Try This Experiment:
-Change the default model to "gpt-4.1-mini" and see how agent behavior changes.
-You'll notice faster responses but potentially less nuanced reasoning.
+Switch "profiler" to "gpt-4.1-mini" in MODEL_BY_ROLE and see how agent behavior
+changes. You'll notice faster responses but potentially less nuanced reasoning.
 """
 
-from openai import AsyncOpenAI
+import os
+from functools import lru_cache
+from typing import Final, Literal
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, Timeout
 from agents import OpenAIChatCompletionsModel
 from dotenv import load_dotenv
 
 # Load environment variables (OPENAI_API_KEY is required)
 # This must be called before creating the AsyncOpenAI client
-load_dotenv()
+# Skipped when the key is already set (exported in the shell, or .env already
+# loaded by another module) - no need to find and parse .env again
+if not os.environ.get("OPENAI_API_KEY"):
+    load_dotenv()
+
+AgentRole = Literal["intent", "guardrail", "profiler", "evaluator"]
+
+# 💡 A-HA MOMENT: Not every agent needs the biggest model!
+# Intent routing and guardrail checks are yes/no decisions: the mini model
+# answers them just as well, with a fraction of the latency and cost. The full
+# model is reserved for the agents that extract data and make risk decisions.
+MODEL_BY_ROLE: Final[dict[AgentRole, str]] = {
+    "intent": "gpt-4.1-mini",
+    "guardrail": "gpt-4.1-mini",
+    "profiler": "gpt-4.1",
+    "evaluator": "gpt-4.1",
+}
+
+
+@lru_cache(maxsize=1)
+def get_openai_client() -> AsyncOpenAI:
+    """
+    Return the process-wide AsyncOpenAI client, creating it on first use.
+
+    Every client owns its own HTTP connection pool. Sharing one client means
+    every agent reuses the same warm, keep-alive connections instead of paying
+    for a fresh TCP + TLS handshake per client.
 
+    💡 A-HA MOMENT: HTTP/2 lets concurrent requests share ONE connection!
+    The speculative profiler run, the guardrail checks and the streamed intent
+    reply all go out at the same time. Over HTTP/1.1 each needs its own
+    connection; over HTTP/2 they are multiplexed on a single TLS session.
 
+    Returns:
+        AsyncOpenAI: The shared client (API key read from OPENAI_API_KEY)
+    """
+    # Transport retries only cover failed connection attempts (nothing was sent
+    # yet), so they are always safe. The SDK still retries 429/5xx responses.
+    # Limits live on the transport: httpx ignores them once one is passed in.
+    transport = httpx.AsyncHTTPTransport(
+        http2=True,
+        retries=2,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+    )
+    return AsyncOpenAI(
+        # Fail fast on connect, but give long completions room to finish
+        timeout=Timeout(60.0, connect=5.0),
+        http_client=DefaultAsyncHttpxClient(transport=transport),
+    )
+
+
+@lru_cache(maxsize=8)
 def get_completions_model(model: str = "gpt-4.1") -> OpenAIChatCompletionsModel:
     """
     Factory function to create OpenAI chat completion models for Agent SDK.
@@ -46,10 +102,11 @@ def get_completions_model(model: str = "gpt-4.1") -> OpenAIChatCompletionsModel:
     - Retry logic and error handling
     - Integration with Agent SDK's Runner
 
-    💡 A-HA MOMENT: Notice we create a NEW client each time!
-    This might seem wasteful, but AsyncOpenAI clients are lightweight and
-    connection pooling happens internally. Creating per-call clients is
-    the recommended pattern for async OpenAI usage.
+    💡 A-HA MOMENT: Notice we DON'T create a new client each time!
+    Connection pooling happens inside each AsyncOpenAI client, so a client per
+    agent would mean a connection pool (and TLS handshakes) per agent. All
+    models share one client, and the factory itself is cached: calling it
+    twice with the same model name returns the same wrapper.
 
     Args:
         model: The OpenAI model identifier (default: "gpt-4.1")
@@ -69,12 +126,26 @@ def get_completions_model(model: str = "gpt-4.1") -> OpenAIChatCompletionsModel:
         guardrail_model = get_completions_model(model="gpt-4.1-mini")
     """
 
-    # Create async OpenAI client
+    # Reuse the shared async OpenAI client
     # API key is loaded from OPENAI_API_KEY environment variable
-    client = AsyncOpenAI()
+    client = get_openai_client()
 
     # Wrap the client in the Agent SDK's model wrapper
     # This adds Agent-specific functionality on top of the raw OpenAI client
     model = OpenAIChatCompletionsModel(model=model, openai_client=client)
 
     return model
+
+
+def get_model_for_role(role: AgentRole) -> OpenAIChatCompletionsModel:
+    """
+    Return the model wrapper for an agent role, as configured in MODEL_BY_ROLE.
+
+    Args:
+        role: Which kind of agent the model is for ("intent", "guardrail",
+              "profiler" or "evaluator")
+
+    Returns:
+        OpenAIChatCompletionsModel: The (cached) wrapper for that role's model
+    """
+    return get_completions_model(model=MODEL_BY_ROLE[role])
@@ -0,0 +1,166 @@
+"""
+Offline Batch Evaluation - Replaying Prompts Through the OpenAI Batch API
+
+The interactive chat service sends one request per turn, because a user is
+waiting for every answer. Replaying a dataset of logged conversations
+(regression tests, eval runs) has no one waiting - so instead of calling
+Runner.run once per prompt, we upload every request in a single JSONL file and
+let OpenAI process them asynchronously.
+
+Key Concepts:
+1. Batch API: One file upload + one batch job instead of N chat completions
+2. Same Agent, Same Prompt: Instructions, model, settings and output schema are
+   read from loan_profiler_agent, so batch results match what the chat returns
+3. Structured Outputs: Each request carries the profiler's strict JSON schema,
+   and results are parsed back into LoanClassification objects
+
+💡 A-HA MOMENT: Batch requests cost ~50% less!
+They also have their own rate limits, so a big eval run doesn't eat into the
+requests-per-minute quota of the interactive chat (and slow it down).
+The trade-off: results arrive within a 24h window, not in seconds.
+
+Note: This path calls the model directly, without the Runner - so there are no
+input guardrails and no handoffs. It's meant for trusted, logged prompts.
+
+Usage (one prompt per line on stdin):
+    uv run src/services/batch_service.py < prompts.txt
+"""
+
+import asyncio
+import json
+import sys
+from typing import Any, Final
+
+from agents import ModelBehaviorError
+
+from src.agent.profiler import loan_profiler_agent, LoanClassification
+from src.models.completions import get_openai_client
+
+# Batch jobs end in one of these states - anything else is still running
+_TERMINAL_STATUSES: Final[frozenset[str]] = frozenset(
+    {"completed", "failed", "expired", "cancelled"}
+)
+
+
+def _request_body(prompt: str) -> dict[str, Any]:
+    """Build the chat completion request the Loan Profiler would send for a prompt."""
+    settings = loan_profiler_agent.model_settings
+    output_schema = loan_profiler_agent.output_type
+    return {
+        "model": loan_profiler_agent.model.model,
+        "messages": [
+            {"role": "system", "content": loan_profiler_agent.instructions},
+            {"role": "user", "content": prompt},
+        ],
+        "temperature": settings.temperature,
+        "max_tokens": settings.max_tokens,
+        # Same strict schema the Agent SDK sends in interactive runs
+        "response_format": {
+            "type": "json_schema",
+            "json_schema": {
+                "name": "final_output",
+                "strict": output_schema.is_strict_json_schema(),
+                "schema": output_schema.json_schema(),
+            },
+        },
+    }
+
+
+def _parse_result(line: str) -> tuple[str, LoanClassification | None]:
+    """Parse one line of the batch output file into (custom_id, classification)."""
+    result = json.loads(line)
+    custom_id = result["custom_id"]
+    response = result.get("response") or {}
+    if response.get("status_code") != 200:
+        return custom_id, None
+
+    content = response["body"]["choices"][0]["message"].get("content")
+    # A refusal comes back with content=null (and message.refusal set instead)
+    if not isinstance(content, str):
+        return custom_id, None
+
+    try:
+        return custom_id, loan_profiler_agent.output_type.validate_json(content)
+    except ModelBehaviorError:
+        return custom_id, None
+
+
+async def run_batch(
+    prompts: list[str], poll_seconds: float = 30.0
+) -> list[LoanClassification | None]:
+    """
+    Classify many prompts with the Loan Profiler in a single OpenAI batch job.
+
+    Flow:
+    1. Render every prompt into a JSONL line (one chat completion request each)
+    2. Upload the file and create the batch job
+    3. Poll until the job reaches a terminal state
+    4. Download the results and parse them back into LoanClassification
+
+    Args:
+        prompts: User messages to classify, each one a standalone conversation
+        poll_seconds: How long to wait between status checks
+
+    Returns:
+        One LoanClassification per prompt, in the same order as prompts.
+        None where the request failed, the model refused, or the output could
+        not be parsed.
+
+    Raises:
+        RuntimeError: If the batch job fails, expires or is cancelled
+    """
+    # Nothing to classify - don't upload an empty batch file
+    if not prompts:
+        return []
+
+    client = get_openai_client()
+
+    # Step 1: One request per line - custom_id maps results back to prompts
+    # (the output file is NOT guaranteed to keep the input order)
+    jsonl = "\n".join(
+        json.dumps(
+            {
+                "custom_id": f"t{i}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": _request_body(prompt),
+            }
+        )
+        for i, prompt in enumerate(prompts)
+    )
+
+    # Step 2: Upload the requests and start the batch job
+    batch_file = await client.files.create(
+        file=("batch.jsonl", jsonl.encode()), purpose="batch"
+    )
+    batch = await client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+
+    # Step 3: Wait for the job to finish
+    while batch.status not in _TERMINAL_STATUSES:
+        await asyncio.sleep(poll_seconds)
+        batch = await client.batches.retrieve(batch.id)
+
+    if batch.status != "completed":
+        raise RuntimeError(f"Batch {batch.id} ended with status {batch.status!r}")
+
+    # Step 4: Download and parse the results
+    # Requests that errored are in batch.error_file_id and stay None here
+    results: dict[str, LoanClassification | None] = {}
+    if batch.output_file_id:
+        output = await client.files.content(batch.output_file_id)
+        for line in output.text.splitlines():
+            if line.strip():
+                custom_id, classification = _parse_result(line)
+                results[custom_id] = classification
+
+    return [results.get(f"t{i}") for i in range(len(prompts))]
+
+
+if __name__ == "__main__":
+    prompts = [line.strip() for line in sys.stdin if line.strip()]
+    for classification in asyncio.run(run_batch(prompts)):
+        print(classification.model_dump_json() if classification else None)
@@ -7,6 +7,7 @@ It demonstrates:
 2. Structured outputs with Pydantic models
 3. Conversation state management with SQLiteSession
 4. Phoenix observability integration for agent tracing
+5. Streaming plain-text replies as they are generated
 
 The system uses three specialized agents working together:
 - Intent Agent: Determines if the user query is loan-related
@@ -14,26 +15,69 @@ The system uses three specialized agents working together:
 - Product Evaluator Agent: Classifies the user into a product tier (bronze/silver/gold)
 """
 
-from agents import Runner, SQLiteSession
+from agents import (
+    Agent,
+    InputGuardrailTripwireTriggered,
+    ModelSettings,
+    RunConfig,
+    RunResult,
+    RunResultStreaming,
+    Runner,
+    SQLiteSession,
+    TResponseInputItem,
+)
+from openai.types.responses import ResponseTextDeltaEvent
 import asyncio
+import os
+import sys
+from collections import OrderedDict
 from phoenix.otel import register
+from pathlib import Path
 from uuid import uuid4
 from textwrap import dedent
+from typing import Final
 from dotenv import load_dotenv
 
+# uvloop (libuv-based event loop) is not available on Windows - fall back to
+# the stock asyncio loop there, or whenever it isn't installed
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 from src.agent.intent import intent_agent
 from src.agent.profiler import loan_profiler_agent, LoanClassification
-from src.agent.evaluator import product_evaluator_agent, LoanProduct
+from src.agent.evaluator import product_evaluator_agent, LoanProduct, evaluate_cached
 from src.agent.context import ConversationContext
 
 # Load environment variables (OPENAI_API_KEY, PHOENIX_API_KEY, etc.)
 load_dotenv()
 
+# Configure agent handoff chain - once per process, not once per conversation
+# This creates a directed graph of agent transitions:
+#   Intent Agent → Loan Profiler Agent → Product Evaluator Agent
+#
+# 💡 A-HA MOMENT: Agents can only hand off to agents in their handoffs list!
+# This prevents infinite loops and ensures a clear conversation flow.
+intent_agent.handoffs = [loan_profiler_agent]
+loan_profiler_agent.handoffs = [product_evaluator_agent]
+
 # SQLite session for conversation persistence
-# Using in-memory database (:memory:) for workshop simplicity
-# In production, you would use a persistent database path
-# Each conversation gets a unique session_id via UUID
-session = SQLiteSession(session_id=str(uuid4()), db_path=":memory:")
+# Stored on disk (backend/.sessions/chat.db, created on the first run()) instead
+# of in memory. Each run() starts a NEW conversation with a fresh UUID - set
+# CHAT_SESSION_ID to the id of an earlier one to continue it with its history.
+# Nothing ever deletes old conversations, so the file keeps growing: delete
+# backend/.sessions/ to start over. The Agent SDK opens the file in WAL mode and
+# indexes messages by (session_id, created_at), so appending a turn and reading
+# the history back stay cheap as the file grows.
+SESSIONS_DB_PATH = Path(__file__).resolve().parents[2] / ".sessions" / "chat.db"
+
+# Closing message, dedented once here instead of on every finished conversation
+_DONE_TEMPLATE: Final[str] = dedent("""
+    Thanks! Your product classification is {tier}.
+
+    A human agent will get in touch with you shortly.
+""")
 
 """
 🎯 STUDENT EXERCISE: Phoenix Observability Setup
@@ -54,20 +98,255 @@ Setup Instructions:
 4. Uncomment the code below and replace <YOUR_PROJECT_NAME>
 5. Run the application and watch the traces in Phoenix dashboard!
 
+💡 A-HA MOMENT: batch=True keeps tracing off the hot path!
+By default every finished span is exported right away, with a blocking HTTP
+call - once per agent run, guardrail check and LLM call. With batch=True spans
+are queued and exported in the background, in batches. Tune the batching in
+your .env if needed (standard OpenTelemetry settings):
+   OTEL_BSP_SCHEDULE_DELAY=2000          # ms between exports
+   OTEL_BSP_MAX_QUEUE_SIZE=2048          # spans buffered before dropping
+   OTEL_BSP_MAX_EXPORT_BATCH_SIZE=256    # spans per export request
+
 tracer_provider = register(
     project_name="<YOUR_PROJECT_NAME>",  # e.g., "loan-originator-workshop"
-    auto_instrument=True  # Automatically instruments OpenAI agents
+    auto_instrument=True,  # Automatically instruments OpenAI agents
+    batch=True,  # Export spans from a background BatchSpanProcessor
 )
 """
 
 
-async def run():
+async def ainput(prompt: str) -> str:
+    """
+    Read a line from stdin without blocking the event loop.
+
+    The builtin input() blocks the whole thread while the user types, which
+    freezes every background task (HTTP keep-alives, trace exporters, etc.).
+    Running it in a worker thread keeps the event loop free.
+    """
+    return await asyncio.to_thread(input, prompt)
+
+
+def _run_config(session_id: str) -> RunConfig:
+    """
+    Run settings shared by every agent run of one conversation.
+
+    💡 A-HA MOMENT: OpenAI caches long prompt prefixes (≥1024 tokens) it has seen!
+    Every turn re-sends the same static instructions plus the growing history, so
+    after the first turn most of the prompt is a byte-identical prefix. Tagging
+    requests with the session id routes them to where that prefix is cached:
+    cached input tokens are cheaper and skip most of the prefill latency.
+    extra_args is merged with each agent's own ModelSettings (temperature, etc.)
+    """
+    return RunConfig(
+        model_settings=ModelSettings(extra_args={"prompt_cache_key": session_id})
+    )
+
+
+async def _stream_turn(
+    agent: Agent[ConversationContext],
+    prompt: str,
+    context: ConversationContext,
+    session: SQLiteSession,
+    run_config: RunConfig,
+    stop_at: Agent[ConversationContext] | None = None,
+) -> tuple[RunResultStreaming, bool]:
+    """
+    Run one conversation turn, printing plain-text replies as they stream.
+
+    Args:
+        agent: The agent that starts the turn
+        prompt: The user's message
+        context: Shared conversation context
+        session: Session the turn reads history from and writes its items to
+        run_config: The conversation's run settings (see _run_config)
+        stop_at: Cancel the run as soon as it hands off to this agent
+
+    Returns:
+        The streamed run result, and whether any text was printed while streaming
+    """
+    # Runner.run_streamed() is the key orchestrator that:
+    # - Executes the current agent
+    # - Runs input guardrails (if configured)
+    # - Handles agent handoffs automatically
+    # - Maintains conversation history via session
+    # - Streams events while the model is still generating
+    result = Runner.run_streamed(
+        starting_agent=agent,
+        input=prompt,
+        context=context,
+        session=session,
+        run_config=run_config,
+    )
+
+    # 💡 A-HA MOMENT: Streaming doesn't make the model faster...
+    # ...but the user sees the first words after ~hundreds of ms instead of
+    # waiting for the whole reply. Only plain-text replies (Intent Agent) are
+    # printed as they stream - structured outputs are JSON, so for those we
+    # wait for the final parsed object.
+    streamed_text = False
+    try:
+        async for event in result.stream_events():
+            if (
+                event.type == "agent_updated_stream_event"
+                and event.new_agent is stop_at
+            ):
+                # Keep draining the stream so the cancellation completes cleanly
+                result.cancel()
+            elif (
+                event.type == "raw_response_event"
+                and isinstance(event.data, ResponseTextDeltaEvent)
+                and result.current_agent.output_type is None
+            ):
+                # Flushed per delta on purpose: buffering would hold back the very
+                # tokens the user is waiting for, which defeats streaming
+                sys.stdout.write(event.data.delta)
+                sys.stdout.flush()
+                streamed_text = True
+    except InputGuardrailTripwireTriggered:
+        # The SDK saves the user's message before the guardrail trips (and nothing
+        # after it) - drop it, so the rejected text stays out of the history
+        await session.pop_item()
+        raise
+    if streamed_text:
+        sys.stdout.write("\n")
+
+    return result, streamed_text
+
+
+async def _fork_session(
+    session: SQLiteSession, history: list[TResponseInputItem]
+) -> SQLiteSession:
+    """In-memory copy of the conversation so far, for a run we may throw away."""
+    fork = SQLiteSession(session_id=session.session_id)
+    if history:
+        await fork.add_items(history)
+    return fork
+
+
+# Routing decisions of the Intent Agent, keyed on the normalized prompt:
+# True = handed off to the Loan Profiler, False = answered by the Intent Agent.
+# Only used for conversation openers: with history, the same words ("yes") can
+# mean something else, so the decision isn't a function of the prompt alone.
+# Bounded LRU: the oldest entry is evicted once we hit _ROUTE_CACHE_MAXSIZE.
+_ROUTE_CACHE_MAXSIZE: Final[int] = 1024
+_route_cache: OrderedDict[str, bool] = OrderedDict()
+
+
+def _normalize(prompt: str) -> str:
+    """Case- and whitespace-insensitive form of a prompt, used as a cache key."""
+    return " ".join(prompt.lower().split())
+
+
+async def _run_intent_turn(
+    prompt: str,
+    context: ConversationContext,
+    session: SQLiteSession,
+    run_config: RunConfig,
+) -> tuple[RunResult | RunResultStreaming, bool]:
+    """
+    Run the Intent Agent while speculatively running the Loan Profiler in parallel.
+
+    Loan questions are the happy path, and there the Intent Agent almost always
+    hands off to the Loan Profiler - which then has to run from scratch. Instead,
+    we start the profiler on the same message right away:
+    - Intent hands off → we cancel the intent run and use the profiler's result,
+      which is already done or nearly so. One round-trip saved.
+    - Intent answers itself → we cancel the profiler. Its work is wasted: the
+      profiler call, its input guardrail check and - since off-topic text
+      trips that guardrail - the guardrail's feedback call. Up to three calls,
+      two of them on the cheap mini model.
+
+    Both runs work on throwaway copies of the history, and only the run we keep
+    is written to the real session - so the conversation history never forks.
+
+    Note: The SDK only runs input guardrails for a run's STARTING agent. The
+    speculative run starts at the Loan Profiler, so every message the Intent
+    Agent hands off - conversation openers included - is now checked by
+    check_user_input before the profiler's answer is used. A tripped guardrail
+    raises InputGuardrailTripwireTriggered, which run() turns into feedback.
+
+    💡 A-HA MOMENT: Users retype the same openers ("I need a loan") all the time!
+    The routing decision for a conversation's FIRST message is remembered per
+    normalized prompt, so when the same process serves another conversation
+    (another run()), a repeated opener skips the guessing: straight to the Loan
+    Profiler (no intent call at all), or straight to the Intent Agent (no wasted
+    speculative call). Later messages always go through the Intent Agent.
+
+    Returns:
+        The run result we kept, and whether any text was printed while streaming
+    """
+    history = await session.get_items()
+
+    # No history = a conversation opener, the only case where the route cache applies
+    key = _normalize(prompt) if not history else None
+    cached_route = _route_cache.get(key) if key is not None else None
+    if cached_route is not None:
+        _route_cache.move_to_end(key)
+        agent = loan_profiler_agent if cached_route else intent_agent
+        return await _stream_turn(agent, prompt, context, session, run_config)
+
+    intent_session = await _fork_session(session, history)
+    profiler_session = await _fork_session(session, history)
+
+    speculative = asyncio.create_task(
+        Runner.run(
+            loan_profiler_agent,
+            prompt,
+            context=context,
+            session=profiler_session,
+            run_config=run_config,
+        )
+    )
+    try:
+        result, streamed_text = await _stream_turn(
+            intent_agent,
+            prompt,
+            context,
+            intent_session,
+            run_config,
+            stop_at=loan_profiler_agent,
+        )
+
+        # The intent run was cancelled right at the handoff, so look for the
+        # handoff itself rather than at last_agent (it never got to switch)
+        handed_off = any(
+            item.type == "handoff_output_item" for item in result.new_items
+        )
+        if key is not None:
+            _route_cache[key] = handed_off
+            if len(_route_cache) > _ROUTE_CACHE_MAXSIZE:
+                _route_cache.popitem(last=False)
+
+        if handed_off:
+            result, streamed_text = await speculative, False
+            kept_session = profiler_session
+        else:
+            kept_session = intent_session
+
+        # Commit only the new items of the run we kept to the real session
+        new_items = (await kept_session.get_items())[len(history) :]
+        await session.add_items(new_items)
+    finally:
+        # A no-op if we used the speculative result - otherwise cancel it, and
+        # retrieve (and discard) the cancellation or any error it raised
+        speculative.cancel()
+        await asyncio.gather(speculative, return_exceptions=True)
+        intent_session.close()
+        profiler_session.close()
+
+    return result, streamed_text
+
+
+async def run(session_id: str | None = None):
     """
     Main conversation loop orchestrating the multi-agent workflow.
 
+    Every call is one conversation: pass the id of an earlier one to continue
+    it, or leave it out to start a new one (with a fresh UUID).
+
     Flow:
     1. Set up shared context for all agents
-    2. Configure agent handoff chain
+    2. Start with the Intent Agent (handoff chain is wired at import)
     3. Run conversation loop until loan product is assigned
     4. Handle different output types (LoanClassification vs LoanProduct)
     """
@@ -76,68 +355,102 @@ async def run():
     # across the entire conversation (e.g., product_tier classification)
     context = ConversationContext()
 
-    # Step 2: Configure agent handoff chain
-    # This creates a directed graph of agent transitions:
-    #   Intent Agent → Loan Profiler Agent → Product Evaluator Agent
-    #
-    # 💡 A-HA MOMENT: Agents can only hand off to agents in their handoffs list!
-    # This prevents infinite loops and ensures a clear conversation flow.
-    loan_profiler_agent.handoffs = [product_evaluator_agent]
-    intent_agent.handoffs = [loan_profiler_agent]
+    # The conversation history (see SESSIONS_DB_PATH above)
+    SESSIONS_DB_PATH.parent.mkdir(exist_ok=True)
+    session = SQLiteSession(
+        session_id=session_id or str(uuid4()), db_path=SESSIONS_DB_PATH
+    )
+    run_config = _run_config(session.session_id)
 
-    # Step 3: Start with the Intent Agent
+    # Step 2: Start with the Intent Agent
     # This agent acts as a "router" to determine if the query is loan-related
     current_agent = intent_agent
     agent_message = "Hi, how can I help you today?"
+    # Status lines of the last turn, written together with the next message
+    status = ""
 
-    # Step 4: Main conversation loop
+    # Step 3: Main conversation loop
     while True:
-        print(agent_message)
-        prompt = input("Enter your message: ")
-
-        # Runner.run() is the key orchestrator that:
-        # - Executes the current agent
-        # - Runs input guardrails (if configured)
-        # - Handles agent handoffs automatically
-        # - Maintains conversation history via session
-        result = await Runner.run(
-            starting_agent=current_agent, input=prompt, context=context, session=session
-        )
+        # One write (and one flush) per turn instead of a print() per line
+        sys.stdout.write(f"{status}{agent_message}\n")
+        sys.stdout.flush()
+        prompt = await ainput("Enter your message: ")
+
+        # 💡 A-HA MOMENT: While the Intent Agent decides, the Loan Profiler is
+        # already working on the same message (see _run_intent_turn)
+        try:
+            if current_agent is intent_agent:
+                result, streamed_text = await _run_intent_turn(
+                    prompt, context, session, run_config
+                )
+            else:
+                result, streamed_text = await _stream_turn(
+                    current_agent, prompt, context, session, run_config
+                )
+        except InputGuardrailTripwireTriggered as e:
+            # 💡 A-HA MOMENT: This is where the guardrail's feedback reaches the user!
+            # The rejected message never reached the agent, so we show why and ask
+            # the same question again
+            status = f"{e.guardrail_result.output.output_info.feedback}\n"
+            continue
 
         # Track which agent ended up handling this turn
         # This may be different from starting_agent if a handoff occurred!
         current_agent = result.last_agent
-        print(f"Current agent: {current_agent.name}")
+        status = f"Current agent: {current_agent.name}\n"
 
-        # Step 5: Handle structured outputs based on agent type
+        # Step 4: Handle structured outputs based on agent type
+        output = result.final_output
 
-        # Case 1: Loan Profiler Agent returns LoanClassification
-        # This means we're still gathering information OR ready to hand off
-        if isinstance(result.final_output, LoanClassification):
-            handover_message = (
-                "Thanks. Let me handover to our Product Evaluator agent..."
+        # 💡 A-HA MOMENT: The agent controls conversation flow via next_question!
+        # If next_question is None (and no tier yet), we're done profiling and
+        # ready to evaluate - right away, no need to wait for another message.
+        # evaluate_cached() skips the LLM for risk profiles it has seen before.
+        if (
+            isinstance(output, LoanClassification)
+            and output.next_question is None
+            and output.product_tier is None
+        ):
+            # Written right away: the user waits for the evaluator after this
+            sys.stdout.write(
+                f"{status}Thanks. Let me handover to our Product Evaluator agent...\n"
             )
-            # 💡 A-HA MOMENT: The agent controls conversation flow via next_question!
-            # If next_question is None, we're done profiling and ready to evaluate
-            agent_message = result.final_output.next_question or handover_message
+            sys.stdout.flush()
+            status = ""
+            output = await evaluate_cached(output, context, session, run_config)
+
+        # Case 1: Loan Profiler Agent returns LoanClassification without a tier
+        # This means we're still gathering information
+        if isinstance(output, LoanClassification) and output.product_tier is None:
+            agent_message = output.next_question
 
-        # Case 2: Product Evaluator Agent returns LoanProduct
+        # Case 2: Product Evaluator Agent returns LoanProduct, OR the Loan Profiler
+        # already assigned a tier itself (all 5 data points in one go)
         # This is our terminal state - the conversation is complete!
-        elif isinstance(result.final_output, LoanProduct):
-            product_tier = result.final_output.product_tier
-            agent_message = dedent(f"""
-                Thanks! Your product classification is {product_tier}.\n
-                A human agent will get in touch with you shortly.
-            """)
+        elif isinstance(output, (LoanProduct, LoanClassification)):
+            product_tier = output.product_tier
+            # Record the decision in the shared context. sys.intern() maps the
+            # LLM's fresh "gold" string onto the one interned copy, so long-lived
+            # contexts share it and tier checks can compare by identity
+            context.product_tier = sys.intern(product_tier)
+            sys.stdout.write(status + _DONE_TEMPLATE.format(tier=product_tier))
+            sys.stdout.flush()
 
             # End the conversation successfully
             return 0
 
         # Case 3: Intent Agent returns plain text (non-loan-related query)
         # This would typically be a polite rejection or redirect
-        else:
-            print(result.final_output)
+        # (usually already printed above, as it streamed - otherwise print it now)
+        elif not streamed_text:
+            status += f"{output}\n"
 
 
 if __name__ == "__main__":
-    asyncio.run(run())
+    # 💡 A-HA MOMENT: The event loop itself is swappable!
+    # uvloop is a drop-in replacement that runs the same coroutines with much
+    # less per-event overhead - useful when many streamed chunks are in flight
+    asyncio.run(
+        run(os.environ.get("CHAT_SESSION_ID")),
+        loop_factory=uvloop.new_event_loop if uvloop else None,
+    )